@@ -281,10 +281,7 @@ def plotMapAxes(self, fig, ax, extent):
         #contouring bathymetry data
         lonstopull = [lon for lon in range(extent[0],extent[1]+1)]
         latstopull = [lat for lat in range(extent[2],extent[3]+1)]
-        lon,lat,data = oci.getbathydata(latstopull,lonstopull, self.bathymetrydata)
-        lon = lon[::4]
-        lat = lat[::4]
-        data = data[::4,::4]
+        lon,lat,data = oci.getbathydata(latstopull,lonstopull, self.bathymetrydata, stride=4)
         data[data >= 0] = np.NaN
         
         conts = [100,250,500,1000,2500,5000,7500]
@@ -279,6 +279,7 @@ def savedataincurtab(self):
                     trace_error()
                     self.posterror("Failed to save BUFR file")
             if self.settingsdict["saveprof"]:
+                fig1 = None
                 try:
                     fig1 = plt.figure()
                     fig1.clear()
@@ -291,9 +292,11 @@ def savedataincurtab(self):
                     trace_error()
                     self.posterror("Failed to save profile image")
                 finally:
-                    plt.close('fig1')
+                    if fig1 is not None:
+                        plt.close(fig1) #close by handle so saved figures don't accumulate in pyplot
 
             if self.settingsdict["saveloc"]:
+                fig2 = None
                 try:
                     fig2 = plt.figure()
                     fig2.clear()
@@ -305,7 +308,8 @@ def savedataincurtab(self):
                     trace_error()
                     self.posterror("Failed to save location image")
                 finally:
-                    plt.close('fig2')
+                    if fig2 is not None:
+                        plt.close(fig2) #close by handle so saved figures don't accumulate in pyplot
 
                 
         elif self.alltabdata[curtabstr]["tabtype"] == "SignalProcessor_completed":
@@ -111,7 +111,7 @@ def rundespiker(rawdepth,rawtemp,maxdev):
         else:
             ge = np.greater_equal(rawdepth, cdepth - depthwin) #all depths above bottom threshold
             le = np.less_equal(rawdepth, cdepth + depthwin) #all depths below top threshold
-            goodindex = np.all([ge,le],axis=0) #all depths with both requirements satisfied
+            goodindex = ge & le #all depths with both requirements satisfied
             
         #pulling subset
         tempspike = rawtemp[goodindex]
@@ -152,7 +152,7 @@ def runsmoother(depth_despike,temp_despike,smoothlev):
                 
             ge = np.greater_equal(depth_despike, cdepth - cursmoothlev/2)
             le = np.less_equal(depth_despike,cdepth + cursmoothlev/2)            
-            goodindex = np.all([ge,le],axis=0)
+            goodindex = ge & le
                 
             #append mean of all points in range as next datapoint
             temp_smooth = np.append(temp_smooth,np.mean(temp_despike[goodindex]))
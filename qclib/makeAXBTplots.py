@@ -53,6 +53,11 @@
 import qclib.geoplotfunctions as gplt
 import numpy as np
 from matplotlib.colors import ListedColormap
+from functools import lru_cache
+
+
+#deep-water bathymetry contour levels (m) overlaid on location plots
+DEEPCONTOURLEVELS = np.arange(-8000,-4000,1000)
 
 
 
@@ -110,22 +115,26 @@ def makelocationplot(fig,ax,lat,lon,dtg,exportlon,exportlat,exportrelief,dcoord)
     if multipoints:
         lonrange = [int(round(np.min(lon))-dcoord),int(round(np.max(lon))+dcoord)]
         latrange = [int(round(np.min(lat))-dcoord),int(round(np.max(lat))+dcoord)]
-        region = gplt.getoceanregion(lon[0],lat[0]) #get basin and region for first point
+        region = getregion(lon[0],lat[0]) #get basin and region for first point
         
     else:
         lonrange = [int(round(lon)-dcoord),int(round(lon)+dcoord)]
         latrange = [int(round(lat)-dcoord),int(round(lat)+dcoord)]
-        region = gplt.getoceanregion(lon,lat) #get basin and region
+        region = getregion(lon,lat) #get basin and region
 
     #read/generate topography colormap
     topo = np.genfromtxt('qclib/topocolors.txt',delimiter=',')
-    alphavals = np.ones((np.shape(topo)[0], 1))
-    topo = np.append(topo, alphavals, axis=1)
-    topomap = ListedColormap(topo)
+    toporgba = np.empty((topo.shape[0], 4)) #RGB colors from file with alpha = 1
+    toporgba[:,:3] = topo
+    toporgba[:,3] = 1.
+    topomap = ListedColormap(toporgba)
 
-    #contour bathymetry
-    c = ax.pcolormesh(exportlon,exportlat,exportrelief,vmin=-4000,vmax=10,cmap = topomap, shading='gouraud')
-    ax.contour(exportlon, exportlat, exportrelief, np.arange(-8000,-4000,1000), colors='white',linestyles='dashed', linewidths=0.5,alpha=0.5)
+    #contour bathymetry (bathymetry is a regular lat/lon grid so imshow w/ bilinear interpolation replaces the much slower gouraud-shaded pcolormesh)
+    #imshow extents are pixel edges, so pad by half a grid spacing to center each pixel on its bathymetry point
+    dlon = (exportlon[-1] - exportlon[0])/(len(exportlon) - 1)
+    dlat = (exportlat[-1] - exportlat[0])/(len(exportlat) - 1)
+    c = ax.imshow(exportrelief, extent=[exportlon[0]-dlon/2,exportlon[-1]+dlon/2,exportlat[0]-dlat/2,exportlat[-1]+dlat/2], origin='lower', vmin=-4000, vmax=10, cmap=topomap, interpolation='bilinear', aspect='auto')
+    ax.contour(exportlon, exportlat, exportrelief, DEEPCONTOURLEVELS, colors='white',linestyles='dashed', linewidths=0.5,alpha=0.5)
     cbar = fig.colorbar(c,ax=ax)
     cbar.set_label('Elevation (m)')
     
@@ -148,4 +157,12 @@ def makelocationplot(fig,ax,lat,lon,dtg,exportlon,exportlat,exportrelief,dcoord)
     ax.set_title(f"Region: {region}",fontweight="bold")
     
     
-    
\ No newline at end of file
+    
+#region lookups (which read the IHO shapefile and check every sea polygon) are cached on a 0.1 degree grid since 
+#repeated/nearby drops in a mission share the same region
+def getregion(lon,lat):
+    return cachedoceanregion(round(float(lon),1),round(float(lat),1))
+    
+@lru_cache(maxsize=4096)
+def cachedoceanregion(lon,lat):
+    return gplt.getoceanregion(lon,lat)
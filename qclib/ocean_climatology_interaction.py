@@ -54,6 +54,10 @@
 #               > matchclimo: 1 if match, 0 if not a match
 #               > climobottomcutoff: climo-indicated profile cutoff depth due
 #                   to a profile bottom strike
+#       o lowerind,upperind,weight = interpweights(x,xp): Locates x on the
+#           monotonic axis xp once so several profiles on xp can be linearly
+#           interpolated to x (same results as np.interp for xp with two
+#           or more points, including NaNs in the interpolated profiles)
 #       o maxoceandepth,exportlat,exportlon,exportrelief = getoceandepth(lat,
 #           lon,dcoord,bathydata): Determines ocean depth and pulls bathymetry
 #           data within certain region (of size 2*dcoord deg lon x 2*dcoord deg
@@ -62,12 +66,19 @@
 #               > maxoceandepth: depth of ocean at point
 #               > exportlat, exportlon, exportrelief: lat/lon vectors, 2D bathy
 #                   data used in makeAXBTplots.makelocationplot()
+#       o exportlon,exportlat,exportrelief = getbathydata(latstopull,lonstopull,
+#           bathydata,stride=1): Pulls bathymetry for the listed 1 degree
+#           segments, optionally keeping only every stride'th point
+#       o climofields = loadclimosegment(month,flat,flon), z = loadbathysegment(
+#           clat,clon): Load a single climatology/bathymetry segment, using the
+#           .npy files generated by preprocess_climo.py when available and the
+#           original .mat files otherwise
 #
 # =============================================================================
+from os import path
+from functools import lru_cache
 import scipy.io as sio
 import numpy as np
-from shapely.geometry import Point
-from shapely.geometry.polygon import Polygon
 import scipy.interpolate as sint
 
 
@@ -79,16 +90,16 @@ def runningsmooth(data,halfwindow):
     if halfwindow*2+1 >= len(data): 
         smoothdata = np.ones(len(data))*np.mean(data)
         
-    #otherwise apply smoothing filter
+    #otherwise apply smoothing filter- window for point i spans data[i-halfwindow:i+halfwindow], truncated at either end
+    #of the dataset. Window sums are differences of a cumulative sum so the whole array is smoothed in one vectorized pass
     else:
-        smoothdata = np.array([])
-        for i in range(len(data)):
-            if i <= halfwindow:
-                smoothdata = np.append(smoothdata,np.mean(data[:i+halfwindow]))
-            elif i >= len(data) - halfwindow:
-                smoothdata = np.append(smoothdata,np.mean(data[i-halfwindow:]))
-            else:
-                smoothdata = np.append(smoothdata,np.mean(data[i-halfwindow:i+halfwindow]))
+        numpoints = len(data)
+        cumdata = np.concatenate(([0.], np.cumsum(data,dtype=np.float64)))
+        inds = np.arange(numpoints)
+        windowstart = np.maximum(inds-halfwindow,0)
+        windowend = np.minimum(inds+halfwindow,numpoints)
+        smoothdata = np.empty(numpoints)
+        np.divide(cumdata[windowend] - cumdata[windowstart], windowend - windowstart, out=smoothdata)
             
     return smoothdata
     
@@ -107,27 +118,42 @@ def getclimatologyprofile(lat,lon,month,climodata):
     flat = np.floor(lat/10)*10
     
     #read file
-    curclimodata = sio.loadmat(f"qcdata/climo/c_M{int(month)}_N{int(flat)}_E{int(flon)}.mat")
+    climofields = loadclimosegment(month,flat,flon)
     
     #accessing climatology grid data
     clon = flon + climodata['vals']
     clat = flat + climodata['vals']
     depth = np.float64(climodata["depth"])
     
-    #pulling current month's temperatures + stdevs, converting to int64, correcting scale
-    #TODO: add lat/lon indexing so it only pulls a small spatial subset to reduce size
-    cmonthtemps = curclimodata["temp"].astype('int64')/100
-    cmonthdevs = curclimodata["stdev"].astype('int64')/100
+    #indices of the 2x2 lat/lon grid cell surrounding the profile location (computed directly since the grid is regular)
+    gridspacing = climodata['vals'][1] - climodata['vals'][0]
+    ilat = min(max(int((lat - clat[0])//gridspacing),0),len(clat)-2)
+    ilon = min(max(int((lon - clon[0])//gridspacing),0),len(clon)-2)
     
-    #correting fill values to NaN
-    cmonthtemps[cmonthtemps == -320] = np.NaN
-    cmonthdevs[cmonthdevs == 2.55] = np.NaN
+    #pulling current month's temperatures + stdevs for that grid cell only
+    climocell = climofields[:,:,ilat:ilat+2,ilon:ilon+2]
 
-    #interpolate to current latitude/longitude
-    climotemps = sint.interpn((depth,clat, clon), cmonthtemps, (depth,lat, lon))
-    
-    #error margin for shading is +/- 1 standard deviation
-    climotemperrors = sint.interpn((depth,clat, clon), cmonthdevs, (depth,lat, lon))
+    #bilinear interpolation of temperatures and errors (margin for shading is +/- 1 standard deviation) to current
+    #latitude/longitude at every depth, computed directly from the 2x2 cell rather than through scipy's interpn
+    #weights are python floats so the blend stays in the float32 precision of the climatology fields
+    latweight = float((lat - clat[ilat])/(clat[ilat+1] - clat[ilat]))
+    lonweight = float((lon - clon[ilon])/(clon[ilon+1] - clon[ilon]))
+    #a weight of exactly 0 or 1 (profile on a grid line) takes that row/column alone, so NaN fill values on the
+    #zero-weight neighbour aren't blended in as 0*NaN
+    if lonweight == 0:
+        lonblend = climocell[:,:,:,0]
+    elif lonweight == 1:
+        lonblend = climocell[:,:,:,1]
+    else:
+        lonblend = (1-lonweight)*climocell[:,:,:,0] + lonweight*climocell[:,:,:,1]
+    if latweight == 0:
+        climoprofiles = lonblend[:,:,0]
+    elif latweight == 1:
+        climoprofiles = lonblend[:,:,1]
+    else:
+        climoprofiles = (1-latweight)*lonblend[:,:,0] + latweight*lonblend[:,:,1]
+    climotemps = climoprofiles[0]
+    climotemperrors = climoprofiles[1]
     
     #find/remove NaNs
     notnanind = ~np.isnan(climotemps*climotemperrors*depth)
@@ -135,9 +161,14 @@ def getclimatologyprofile(lat,lon,month,climodata):
     climotemperrors = climotemperrors[notnanind]
     depth = depth[notnanind]
     
-    #generating fill vectors
-    tempfill = np.append(climotemps-climotemperrors,np.flip(climotemps+climotemperrors))
-    depthfill = np.append(depth,np.flip(depth))
+    #generating fill vectors (down the cold side of the profile, back up the warm side)
+    numdepths = len(depth)
+    tempfill = np.empty(2*numdepths)
+    tempfill[:numdepths] = climotemps - climotemperrors
+    tempfill[numdepths:] = (climotemps + climotemperrors)[::-1]
+    depthfill = np.empty(2*numdepths)
+    depthfill[:numdepths] = depth
+    depthfill[numdepths:] = depth[::-1]
     
     return [climotemps,depth,tempfill,depthfill]
         
@@ -150,56 +181,53 @@ def comparetoclimo(temperature,depth,climotemps,climodepths,climotempfill,climod
     
     climotemps[np.less_equal(climotemps,-8)] = np.nan
     
-    #interpolating climatology to match profile depths
-    intclimotemp = np.interp(depth,climodepths,climotemps)
+    #interpolating climatology to match profile depths- profile depths are located on the climatology depth axis once
+    #and the same indices/weights are reused for the climatology fill band below (its depths match climodepths)
+    lowerind,upperind,weight = interpweights(depth,climodepths)
+    intclimotemp = (1-weight)*climotemps[lowerind] + weight*climotemps[upperind]
     
     #identifying and removing NaNs from dataset
-    isnandata = np.isnan(intclimotemp*temperature)
+    isvalid = ~np.isnan(intclimotemp*temperature)
     
-    if sum(isnandata) != len(isnandata): #if there are non-NaN datapoints
-        temperature = temperature[isnandata == 0]
-        intclimotemp = intclimotemp[isnandata == 0]
-        depth = depth[isnandata == 0]
+    if isvalid.any(): #if there are non-NaN datapoints
+        temperature = temperature[isvalid]
+        intclimotemp = intclimotemp[isvalid]
+        depth = depth[isvalid]
+        lowerind,upperind,weight = lowerind[isvalid],upperind[isvalid],weight[isvalid]
         
-        #determining profile slopes
-        climoslope = np.diff(intclimotemp)/np.diff(depth)
-        profslope = np.diff(temperature)/np.diff(depth)
-        slopedepths = 0.5*depth[1:] + 0.5*depth[:-1]
+        #determining difference between climatology and profile slopes (climoslope - profslope) in one pass
+        slopediff = np.diff(intclimotemp - temperature)
+        slopediff /= np.diff(depth)
+        slopedepths = 0.5*(depth[1:] + depth[:-1])
         
         #comparing slopes:
         threshold = 0.1
-        ismismatch = abs(runningsmooth(climoslope-profslope, 50)) >= threshold
+        mismatchinds = np.flatnonzero(np.abs(runningsmooth(slopediff, 50)) >= threshold)
         
         #determining if there is a max depth
-        if sum(ismismatch) != 0:
-            climobottomcutoff = np.max(slopedepths[ismismatch])
-            isabovecutoff = np.less_equal(depth,climobottomcutoff)
-            temperature = temperature[isabovecutoff == 1]
-            depth = depth[isabovecutoff == 1]
+        if mismatchinds.size > 0:
+            climobottomcutoff = np.max(slopedepths[mismatchinds])
+            isabovecutoff = depth <= climobottomcutoff
+            temperature = temperature[isabovecutoff]
+            depth = depth[isabovecutoff]
+            lowerind,upperind,weight = lowerind[isabovecutoff],upperind[isabovecutoff],weight[isabovecutoff]
         else:
             climobottomcutoff = np.nan
 
-        #max depth for climo comparison (if a bottom strike is detected, consider that when comparing profile to climatology)
-        if np.isnan(climobottomcutoff):
-            maxd = 1E10
-        else:
-            maxd = climobottomcutoff
-        
         #check to see if climatology generally matches profile (is 90% of profile within climatology fill window?)
-        isinclimo = []
-        climopolylist = []
-        for i in range(len(climotempfill)):
-            climopolylist.append([climotempfill[i],climodepthfill[i]])
-        climopolygon = Polygon(climopolylist)    
-        
-        depth[0] = 0.1
-        for i in range(len(temperature)):
-            if depth[i] <= maxd:
-                curpoint = Point(temperature[i], depth[i])
-                isinclimo.append(int(climopolygon.contains(curpoint)))
+        #the fill window is a band between the cold (climotemps - stdev) and warm (climotemps + stdev) sides of the climatology
+        #profile that is monotonic in depth, so a point is inside it if it is within the climatology depth range and its
+        #temperature is between the two sides interpolated to its depth (equivalent to a point-in-polygon check on the fill shape)
+        numclimodepths = len(climodepthfill)//2
+        filldepths = climodepthfill[:numclimodepths]
+        coldfill = climotempfill[:numclimodepths]
+        warmfill = climotempfill[numclimodepths:][::-1]
+        coldside = (1-weight)*coldfill[lowerind] + weight*coldfill[upperind]
+        warmside = (1-weight)*warmfill[lowerind] + weight*warmfill[upperind]
+        isinclimo = (depth >= filldepths[0]) & (depth <= filldepths[-1]) & (temperature >= coldside) & (temperature <= warmside)
             
         minpctmatch = 0.5 #checks if prof matches climo: more than (minpctmatch*100) percent of profile must be within +/1 one standard deviation of climatology profile to be considered a match (0 <= minpctmatch <= 1)
-        if sum(isinclimo)/len(isinclimo) >= minpctmatch: 
+        if isinclimo.size > 0 and np.count_nonzero(isinclimo) >= minpctmatch*isinclimo.size: #compares counts (no float mean over the mask)
             matchclimo = 1
         else:
             matchclimo = 0
@@ -209,6 +237,22 @@ def comparetoclimo(temperature,depth,climotemps,climodepths,climotempfill,climod
         climobottomcutoff = np.nan
         
     return matchclimo,climobottomcutoff
+    
+    
+    
+#locates x on the monotonic axis xp so that any profile fp on xp can be linearly interpolated to x as
+#(1-weight)*fp[lowerind] + weight*fp[upperind] (clamped to the end values outside of xp, like np.interp)
+def interpweights(x,xp):
+    lowerind = np.clip(np.searchsorted(xp,x,side='right') - 1, 0, len(xp)-1)
+    upperind = np.minimum(lowerind+1, len(xp)-1)
+    spacing = xp[upperind] - xp[lowerind]
+    weight = np.divide(x - xp[lowerind], spacing, out=np.zeros(len(x)), where=spacing > 0)
+    np.clip(weight, 0, 1, out=weight)
+    #points on (or clamped to) a node only reference that node, so a NaN on the neighbouring level isn't blended in as 0*NaN
+    upperind[weight == 0] = lowerind[weight == 0]
+    lowerind[weight == 1] = upperind[weight == 1]
+    weight[np.isnan(x)] = np.nan
+    return lowerind,upperind,weight
 
 
     
@@ -225,47 +269,119 @@ def getoceandepth(lat,lon,dcoord,bathydata):
     lonstopull = [d+roundlon for d in range(-dcoord-4,dcoord+4+1)]
     latstopull = [d+roundlat for d in range(-dcoord-1,dcoord+1+1)]
     
-    exportlon,exportlat,exportrelief = getbathydata(latstopull,lonstopull, bathydata)
+    exportlon,exportlat,exportrelief,bathyinterpolator = getbathyinterpolator(tuple(latstopull),tuple(lonstopull),tuple(bathydata["vals"]))
     
     #interpolate maximum ocean depth
-    maxoceandepth = -sint.interpn((exportlon,exportlat),exportrelief,(lon,lat))
-    maxoceandepth = maxoceandepth[0]
+    maxoceandepth = -float(bathyinterpolator((lon,lat)))
     
-    num = 4 #adjust this to pull every n elements for topographic data
-    exportlat = exportlat[::num]
-    exportlon = exportlon[::num]
-    exportrelief = exportrelief[::num,::num]
+    num = 4 #adjust this to average every n x n block of elements for topographic data
+    exportlat = blockmean(np.asarray(exportlat),num) #block centers of subsampled grid
+    exportlon = blockmean(np.asarray(exportlon),num)
+    exportrelief = blockmean(exportrelief,num) #block averaging rather than striding avoids aliasing near steep bathymetry
     exportrelief = exportrelief.transpose() #transpose matrix
     
     return maxoceandepth,exportlat,exportlon,exportrelief
     
     
-def getbathydata(latstopull,lonstopull, bathydata):
+    
+#pulls bathymetry for a region and builds its interpolator- cached by region so repeat calls for the same drop
+#(e.g. profile editor, then location plot on save) or nearby drops skip reloading segments and rebuilding the grid
+@lru_cache(maxsize=8)
+def getbathyinterpolator(latstopull,lonstopull,vals):
+    exportlon,exportlat,exportrelief = getbathydata(latstopull,lonstopull,{"vals":np.asarray(vals)})
+    bathyinterpolator = sint.RegularGridInterpolator((exportlon,exportlat),exportrelief,bounds_error=False,fill_value=np.NaN)
+    return exportlon,exportlat,exportrelief,bathyinterpolator
+    
+    
+    
+#averages non-overlapping blocks of num points along each axis of data, trimming any remainder
+def blockmean(data,num):
+    trimmed = data[tuple(slice(0,(n//num)*num) for n in data.shape)]
+    blockshape = []
+    for n in trimmed.shape:
+        blockshape.extend([n//num,num])
+    return trimmed.reshape(blockshape).mean(axis=tuple(range(1,2*trimmed.ndim,2)))
+    
+    
+#pulls bathymetry for the requested 1x1 degree segments, keeping every stride'th point along each axis. Each segment is
+#strided as it is copied in, so only the subsampled grid is ever allocated (identical to striding the full grid)
+def getbathydata(latstopull,lonstopull, bathydata, stride=1):
     
     #generate exportlon and exportlat
-    exportlon = []
-    for clon in lonstopull:
-        exportlon.extend(clon + bathydata["vals"])
-    exportlat = []
-    for clat in latstopull:
-        exportlat.extend(clat + bathydata["vals"])
+    exportlon = np.add.outer(lonstopull,bathydata["vals"]).ravel()[::stride]
+    exportlat = np.add.outer(latstopull,bathydata["vals"]).ravel()[::stride]
     
     #generate exportrelief
     nv = len(bathydata["vals"])
-    exportrelief = np.NaN*np.ones((nv*len(lonstopull),nv*len(latstopull))) #preallocate with NaN
+    exportrelief = np.full((len(exportlon),len(exportlat)), np.NaN, dtype=np.float32) #preallocate with NaN (float32 is sufficient for int16 data)
     
     for (i,clon) in enumerate(lonstopull):
         if clon >= 180:
             clon = clon - 360
         elif clon < -180:
             clon = clon + 360
+            
+        ioff = -i*nv % stride #first point in this segment that falls on the strided grid, and its row in exportrelief
+        irow = (i*nv + ioff)//stride
         
         for (j,clat) in enumerate(latstopull):
             if clat >= -90 and clat < 90:
-                curbathydata = sio.loadmat(f"qcdata/bathy/b_N{int(clat)}_E{int(clon)}.mat")
-                exportrelief[i*nv:(i+1)*nv,j*nv:(j+1)*nv] = curbathydata["z"].astype('float64') #int16 -> float64
+                joff = -j*nv % stride
+                jcol = (j*nv + joff)//stride
+                segment = loadbathysegment(clat,clon)[ioff::stride,joff::stride]
+                exportrelief[irow:irow+segment.shape[0],jcol:jcol+segment.shape[1]] = segment #int16 segment is cast to float32 as it is copied in (no temporary)
                 
     return exportlon,exportlat,exportrelief
     
     
+    
+#loads climatology temperature/stdev fields stacked as a float32 (field,depth,lat,lon) array with fill values set to NaN
+#uses the .npy segment generated by preprocess_climo.py if available (memory-mapped, so only the accessed grid cells
+#are read), otherwise falls back to scaling/masking the original .mat segment. Segments are cached (read-only) so
+#repeat profiles in the same region/month skip reloading them
+@lru_cache(maxsize=16)
+def loadclimosegment(month,flat,flon):
+    
+    filename = f"qcdata/climo/c_M{int(month)}_N{int(flat)}_E{int(flon)}"
+    
+    if path.exists(filename + '.npy'):
+        climofields = np.load(filename + '.npy', mmap_mode='r')
+        
+    else:
+        climofields = scaleclimodata(sio.loadmat(filename + '.mat'))
+        climofields.flags.writeable = False
+        
+    return climofields
+    
+    
+    
+#converts int16 temperatures + stdevs from a climatology .mat segment to a scaled float32 (field,depth,lat,lon) array
+def scaleclimodata(curclimodata):
+    
+    climofields = np.stack((curclimodata["temp"],curclimodata["stdev"])).astype(np.float32)/100
+    
+    #correting fill values to NaN (checked against raw integer values to avoid float32 comparison issues)
+    climofields[0][curclimodata["temp"] == -32000] = np.NaN
+    climofields[1][curclimodata["stdev"] == 255] = np.NaN
+    
+    return climofields
+    
+    
+    
+#loads int16 bathymetry segment, using the .npy segment generated by preprocess_climo.py if available (memory-mapped)
+#segments are cached (read-only) so overlapping regions from successive drops/plots skip reloading them
+@lru_cache(maxsize=256)
+def loadbathysegment(clat,clon):
+    
+    filename = f"qcdata/bathy/b_N{int(clat)}_E{int(clon)}"
+    
+    if path.exists(filename + '.npy'):
+        z = np.load(filename + '.npy', mmap_mode='r')
+    else:
+        z = sio.loadmat(filename + '.mat')["z"]
+        z.flags.writeable = False
+        
+    return z
+    
+    
     
\ No newline at end of file
@@ -0,0 +1,73 @@
+# =============================================================================
+#     Code: preprocess_climo.py
+#
+#    This file is part of the AXBT Realtime Editing System (ARES)
+#
+#    ARES is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    ARES is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with ARES.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     Purpose: One-time conversion of the climatology and bathymetry .mat
+#       segments in qcdata to .npy files that ocean_climatology_interaction.py
+#       can load (and memory-map) far faster than scipy.io.loadmat. The .mat
+#       files are left in place and are still used for any segment without a
+#       converted .npy file.
+#           o Climatology: qcdata/climo/c_M(month)_N(lat)_E(lon).npy holds a
+#               float32 array of shape (2, depth, lat, lon) with the scaled
+#               temperature and standard deviation fields (in that order) and
+#               fill values already set to NaN
+#           o Bathymetry: qcdata/bathy/b_N(lat)_E(lon).npy holds the int16
+#               relief grid ("z") unchanged
+#
+#   Usage (from the ARES directory): python -m qclib.preprocess_climo
+#
+#   Functions:
+#       o convertclimofile(matfile): converts one climatology segment
+#       o convertbathyfile(matfile): converts one bathymetry segment
+#       o convertall(climodir,bathydir): converts all segments in both directories
+#
+# =============================================================================
+
+from os import listdir, path
+import numpy as np
+import scipy.io as sio
+
+import qclib.ocean_climatology_interaction as oci
+
+
+
+def convertclimofile(matfile):
+    climofields = oci.scaleclimodata(sio.loadmat(matfile))
+    np.save(matfile[:-4] + '.npy', climofields)
+
+
+
+def convertbathyfile(matfile):
+    curbathydata = sio.loadmat(matfile)
+    np.save(matfile[:-4] + '.npy', curbathydata["z"])
+
+
+
+def convertall(climodir='qcdata/climo',bathydir='qcdata/bathy'):
+
+    for cfile in listdir(climodir):
+        if cfile.startswith('c_M') and cfile.endswith('.mat'):
+            convertclimofile(path.join(climodir,cfile))
+
+    for cfile in listdir(bathydir):
+        if cfile.startswith('b_N') and cfile.endswith('.mat'):
+            convertbathyfile(path.join(bathydir,cfile))
+
+
+
+if __name__ == "__main__":
+    convertall()
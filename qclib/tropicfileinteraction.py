@@ -35,6 +35,9 @@
 #			raw LOG file
 #		o temperature,depth = readlogfile_alldata(logfile): read T-D profile, 
 #			raw frequency, and corresponding time from raw Mk21-style LOG file
+#		o data,numskipped = parselogcolumns(logfile,usecols,skiplines): parses
+#			the numeric columns in usecols from all sufficiently long lines of a
+#			LOG file, also returning the number of non-blank lines skipped
 #		o rawtemperature,rawdepth,year,month,day,hour,minute,second,lat,lon = ...
 #			readedffile(edffile): reads raw data from EDF file
 #		o writeedffile(edffile,rawtemperature,rawdepth,year,month,day,hour,...
@@ -61,95 +64,100 @@
 #					section 2 in the BUFR message
 #			NOTE: BUFR format version is adjusted within the function, but either BUFR 
 #				versions 3 or 4 may be used.
+#		o bufrdata = packbufrbits(values,widths): packs integer values into
+#			consecutive bit fields of the given widths for BUFR section 4
 #       o writekmlfile(kmlfile, lon, lat, year, month, day, time)
 #            writes kml file that creates placemarks on google earth
 #       o readkmlfile(kmlfile)
 #            reads a kml file and returns the kml object
+#       o outputs = readfiles(files, reader, maxworkers): reads several files
+#            in parallel threads with one of the read functions above (e.g.
+#            reader=readlogfile) or by file type (reader='log', 'edf', 'fin', or
+#            'jjvv'), returning a list of each file's output in order
 # =============================================================================
 
 import numpy as np
 from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor
+from math import isnan
+import struct
+import warnings
 import chardet
+from chardet.universaldetector import UniversalDetector
 
 from pykml import parser
 from pykml.factory import KML_ElementMaker as kml
 import lxml
 
 
-#read raw temperature/depth profile from LOGXX.DTA file
-def readlogfile(logfile):
-
-    with open(logfile,'r') as f_in:
-        depth = []
-        temperature = []
-
-        for line in f_in:
+#BUFR section 3 data descriptors (FXY), packed once at import: 0,01,011 / 3,01,011 / 3,01,012 / 3,01,023 / 0,02,032 /
+#1,02,000 / 0,31,002 / 0,07,062 / 0,22,042 (WITH DELAYED REPLICATION)
+BUFRFXYBYTES = struct.pack('>9H', int('0000000100001011', 2),int('1100000100001011', 2),int('1100000100001100', 2),int('1100000100010111', 2),int('0000001000100000', 2),int('0100001000000000', 2),int('0001111100000010', 2),int('0000011100111110', 2),int('0001011000101010', 2))
 
-            line = line.strip().split() #get rid of \n character, split by spaces
 
-            try:
-                curfreq = np.double(line[2])
-                cdepth = np.double(line[1])
-                ctemp = np.double(line[3])
-            except:
-                curfreq = np.NaN
-
-            if ~np.isnan(curfreq) and curfreq != 0: #if it is a valid frequency, save the datapoint
-                depth.append(cdepth)
-                temperature.append(ctemp)
+#read raw temperature/depth profile from LOGXX.DTA file
+def readlogfile(logfile):
     
-    #convert to numpy arrays
-    depth = np.asarray(depth)
-    temperature = np.asarray(temperature)
+    #parse all lines at once (columns: time, depth, frequency, temp (C), temp (F)): lines with fewer than four columns
+    #(e.g. header/blank lines) are dropped beforehand and non-numeric entries (header text, '******') are read as NaN
+    data,_ = parselogcolumns(logfile, (1,2,3))
     
-    return [temperature,depth]
+    depth = data[:,0]
+    frequency = data[:,1]
+    temperature = data[:,2]
+    
+    #only save datapoints with a valid frequency (and depth/temperature)
+    isvalid = (frequency != 0) & ~np.isnan(frequency*depth*temperature)
+    
+    return [temperature[isvalid],depth[isvalid]]
     
 
     
 
 #read raw temperature/depth profile with all other data from LOGXX.DTA file
 def readlogfile_alldata(logfile):
-
-    with open(logfile,'r') as f_in:
-        time = []
-        depth = []
-        frequency = []
-        temperature = []
-
-        #read in header lines
-        for i in range(6):
-            f_in.readline()
-
-        #read data lines
-        for line in f_in:
-            line = line.strip().split() #get rid of \n character, split by spaces
-
-            try:
-                curfreq = np.double(line[2])
-            except:
-                curfreq = np.NaN
-
-            if ~np.isnan(curfreq) and curfreq != 0: #if it is a valid frequency, save the datapoint
-                depth.append(np.double(line[1]))
-                temperature.append(np.double(line[3]))
-            else:
-                depth.append(np.NaN)
-                temperature.append(np.NaN)
-
-            time.append(np.double(line[0]))
-            frequency.append(np.double(line[2]))
     
-    #convert to numpy arrays
-    time = np.asarray(time)
-    depth = np.asarray(depth)
-    frequency = np.asarray(frequency)
-    temperature = np.asarray(temperature)
+    #skip the 6 header lines and parse all data lines at once (non-numeric entries such as '******' are read as NaN)
+    data,numskipped = parselogcolumns(logfile, (0,1,2,3), skiplines=6)
+    
+    #every line after the header should be a data line: flag short (e.g. truncated) lines rather than silently dropping them
+    if numskipped > 0:
+        warnings.warn(f"{numskipped} line(s) with fewer than four columns skipped in {logfile}")
+    
+    time = data[:,0]
+    depth = data[:,1]
+    frequency = data[:,2]
+    temperature = data[:,3]
+    
+    #depth/temperature are NaN for all points without a valid frequency
+    isinvalid = np.isnan(frequency) | (frequency == 0)
+    depth[isinvalid] = np.NaN
+    temperature[isinvalid] = np.NaN
     
     return [temperature,depth,time,frequency]
     
     
     
     
+#reads the columns in usecols from all lines of a LOGXX.DTA file (after the first skiplines lines) that have enough
+#columns: short lines are dropped here rather than by genfromtxt, which would warn about each one (suppressing those
+#warnings changes the process-wide warning filters, which isn't safe when files are read in parallel by readfiles)
+def parselogcolumns(logfile, usecols, skiplines=0):
+    
+    with open(logfile,'r') as f_in:
+        lines = f_in.read().splitlines()[skiplines:]
+    numnonblank = sum(1 for line in lines if line.strip())
+    lines = [line for line in lines if len(line.split()) > max(usecols)]
+    numskipped = numnonblank - len(lines)
+    
+    if not lines: #genfromtxt warns for empty input
+        return np.empty((0,len(usecols))),numskipped
+    #no comment character: a '#' in a line (e.g. "Serial # = 12345") is just another non-numeric entry, as the length check above assumes
+    return np.genfromtxt(lines, usecols=usecols, comments=None).reshape(-1,len(usecols)),numskipped
+    
+    
+    
+
 def writelogfile(logfile,initdatestr,inittimestr,timefromstart,depth,frequency,tempc):
     with open(logfile,'w') as f_out:
 
@@ -161,28 +169,37 @@ def writelogfile(logfile,initdatestr,inittimestr,timefromstart,depth,frequency,t
 
         #temperature (degF) conversion
         tempf = tempc*1.8+32
+        
+        #rounding each column in one pass (converted to python floats, which format identically)
+        timefromstart = np.round(timefromstart,1).tolist()
+        depth = np.round(depth,1).tolist()
+        frequency = np.round(frequency,3).tolist()
+        tempc = np.round(tempc,2).tolist()
+        tempf = np.round(tempf,2).tolist()
 
         #writing data
+        lines = []
         for t,d,f,tc,tf in zip(timefromstart,depth,frequency,tempc,tempf):
 
             #formatting strings
-            tstr = str(round(t,1)).zfill(4)
-            fstr = str(round(f,3)).zfill(5)
-            if np.isnan(d):
+            tstr = str(t).zfill(4)
+            fstr = str(f).zfill(5)
+            if isnan(d):
                 dstr = '-10.0'
             else:
-                dstr = str(round(d,1)).zfill(4)
-            if np.isnan(tc):
+                dstr = str(d).zfill(4)
+            if isnan(tc):
                 tcstr = '******'
             else:
-                tcstr = str(round(tc,2)).zfill(4)
-            if np.isnan(tf):
+                tcstr = str(tc).zfill(4)
+            if isnan(tf):
                 tfstr = '******'
             else:
-                tfstr = str(round(tf,2)).zfill(4)
+                tfstr = str(tf).zfill(4)
 
-            line = tstr.rjust(7) + dstr.rjust(10) + fstr.rjust(11) + tcstr.rjust(10) + tfstr.rjust(10) + '\n'
-            f_out.write(line)
+            lines.append(tstr.rjust(7) + dstr.rjust(10) + fstr.rjust(11) + tcstr.rjust(10) + tfstr.rjust(10) + '\n')
+            
+        f_out.write(''.join(lines))
     
             
 
@@ -200,129 +217,147 @@ def readedffile(edffile):
     rawdepth = []
     
     with open(edffile,'rb') as f_in:
+        filebytes = f_in.read()
         
-        for line in f_in:
+    #decode the whole file at once if it is valid utf-8, otherwise detect the encoding once from the file (chardet is much
+    #more reliable with a large sample than with one line, and is fed in chunks until it is confident) and decode line
+    #by line, re-detecting the encoding of any line that still can't be decoded
+    try:
+        lines = filebytes.decode(encoding).split('\n')
+    except UnicodeDecodeError:
+        detector = UniversalDetector()
+        for i in range(0,len(filebytes),4096):
+            detector.feed(filebytes[i:i+4096])
+            if detector.done:
+                break
+        detector.close()
+        encoding = detector.result['encoding'] or encoding
+        lines = []
+        for line in filebytes.split(b'\n'):
             try:
-                line = line.decode(encoding).strip()
+                lines.append(line.decode(encoding))
             except:
                 fileinfo = chardet.detect(line)
                 encoding = fileinfo['encoding']
-                line = line.decode(encoding).strip()
+                lines.append(line.decode(encoding))
                 
-            try:
-                if ":" in line: #input parameter- parse appropriately
-                    line = line.strip().split(':')
+    for line in lines:
+        line = line.strip()
+            
+        try:
+            if ":" in line: #input parameter- parse appropriately
+                line = line.strip().split(':')
+                key = line[0].lower() #parameter name, lowercased once for all comparisons below
+                
+                if "time" in key: #assumes time is in "HH", "HH:MM", or "HH:MM:SS" format
+                    hour = int(line[1].strip())
+                    minute = int(line[2].strip())
+                    second = int(line[3].strip())
                     
                     
-                    if "time" in line[0].lower(): #assumes time is in "HH", "HH:MM", or "HH:MM:SS" format
-                        hour = int(line[1].strip())
-                        minute = int(line[2].strip())
-                        second = int(line[3].strip())
-                        
-                        
-                    elif "date" in line[0].lower():
-                        line = line[1].strip() #should be eight digits long
-                        if "/" in line and len(line) <= 8: #mm/dd/yy format
-                            line = line.split('/')
+                elif "date" in key:
+                    line = line[1].strip() #should be eight digits long
+                    if "/" in line and len(line) <= 8: #mm/dd/yy format
+                        line = line.split('/')
+                        month = int(line[0])
+                        day = int(line[1])
+                        year = int(line[2]) + 2000
+                    elif "/" in line and len(line) <= 10: #mm/dd/yyyy, or yyyy/mm/dd (assuming not dd/mm/yyyy)
+                        line = line.split('/')
+                        if len(line[0]) == 4:
+                            year = int(line[0])
+                            month = int(line[1])
+                            day = int(line[2])
+                        elif len(line[2]) == 4:
                             month = int(line[0])
                             day = int(line[1])
-                            year = int(line[2]) + 2000
-                        elif "/" in line and len(line) <= 10: #mm/dd/yyyy, or yyyy/mm/dd (assuming not dd/mm/yyyy)
-                            line = line.split('/')
-                            if len(line[0]) == 4:
-                                year = int(line[0])
-                                month = int(line[1])
-                                day = int(line[2])
-                            elif len(line[2]) == 4:
-                                month = int(line[0])
-                                day = int(line[1])
-                                year = int(line[2])
-                                
-                        elif "-" in line and len(line) <= 8: #mm-dd-yy format
-                            line = line.split('-')
-                            month = int(line[0])
-                            day = int(line[1])
-                            year = int(line[2]) + 2000
-                        elif "-" in line and len(line) <= 10: #mm-dd-yyyy, or yyyy-mm-dd (assuming not dd-mm-yyyy)
-                            line = line.split('-')
-                            if len(line[0]) == 4:
-                                year = int(line[0])
-                                month = int(line[1])
-                                day = int(line[2])
-                            elif len(line[2]) == 4:
-                                year = int(line[2])
-                                month = int(line[1])
-                                day = int(line[0])
-                        
-                        else: #trying YYYYMMDD format instead
-                            year = int(line[:4])
-                            month = int(line[4:6])
-                            day = int(line[6:8])
+                            year = int(line[2])
                             
+                    elif "-" in line and len(line) <= 8: #mm-dd-yy format
+                        line = line.split('-')
+                        month = int(line[0])
+                        day = int(line[1])
+                        year = int(line[2]) + 2000
+                    elif "-" in line and len(line) <= 10: #mm-dd-yyyy, or yyyy-mm-dd (assuming not dd-mm-yyyy)
+                        line = line.split('-')
+                        if len(line[0]) == 4:
+                            year = int(line[0])
+                            month = int(line[1])
+                            day = int(line[2])
+                        elif len(line[2]) == 4:
+                            year = int(line[2])
+                            month = int(line[1])
+                            day = int(line[0])
                     
-                    elif "latitude" in line[0].lower(): 
-                        if 'n' in line[-1].lower() or 's' in line[-1].lower():
-                            if len(line) == 2: #XX.XXXH format
-                                lat = float(line[1][:-1])
-                                if line[1][-1].lower() == 's':
-                                    lat = -1.*lat
-                            elif len(line) == 3: #XX:XX.XXXH format
-                                lat = float(line[1]) + float(line[2][:-1])/60
-                                if line[2][-1].lower() == 's':
-                                    lat = -1.*lat
-                            elif len(line) == 4: #XX:XX:XXH format
-                                lat = float(line[1]) + float(line[2])/60 + float(line[3][:-1])/3600
-                                if line[3][-1].lower() == 's':
-                                    lat = -1.*lat
-                        else:
-                            if len(line) == 2: #XX.XXX format
-                                lat = float(line[1])
-                            elif len(line) == 3: #XX:XX.XXX format
-                                lat = float(line[1]) + float(line[2])/60
-                            elif len(line) == 4: #XX:XX:XX format
-                                lat = float(line[1]) + float(line[2])/60 + float(line[3])/3600
-                            
-                    elif "longitude" in line[0].lower():
-                        if 'e' in line[-1].lower() or 'w' in line[-1].lower():
-                            if len(line) == 2: #XX.XXXH format
-                                lon = float(line[1][:-1])
-                                if line[1][-1].lower() == 'w':
-                                    lon = -1.*lon
-                            elif len(line) == 3: #XX:XX.XXXH format
-                                lon = float(line[1]) + float(line[2][:-1])/60
-                                if line[2][-1].lower() == 'w':
-                                    lon = -1.*lon
-                            elif len(line) == 4: #XX:XX:XXH format
-                                lon = float(line[1]) + float(line[2])/60 + float(line[3][:-1])/3600
-                                if line[3][-1].lower() == 'w':
-                                    lon = -1.*lon
-                        else:
-                            if len(line) == 2: #XX.XXX format
-                                lon = float(line[1])
-                            elif len(line) == 3: #XX:XX.XXX format
-                                lon = float(line[1]) + float(line[2])/60
-                            elif len(line) == 4: #XX:XX:XX format
-                                lon = float(line[1]) + float(line[2])/60 + float(line[3])/3600
-                                
-                                
-                    elif "field" in line[0].lower(): #specifying which column contains temperature and depth
-                        if "temperature" in line[1].lower():
-                            tempcolumn = int(line[0].strip()[5]) - 1
-                        elif "depth" in line[1].lower():
-                            depthcolumn = int(line[0].strip()[5]) - 1
+                    else: #trying YYYYMMDD format instead
+                        year = int(line[:4])
+                        month = int(line[4:6])
+                        day = int(line[6:8])
+                        
+                
+                elif "latitude" in key: 
+                    if 'n' in line[-1].lower() or 's' in line[-1].lower():
+                        if len(line) == 2: #XX.XXXH format
+                            lat = float(line[1][:-1])
+                            if line[1][-1].lower() == 's':
+                                lat = -1.*lat
+                        elif len(line) == 3: #XX:XX.XXXH format
+                            lat = float(line[1]) + float(line[2][:-1])/60
+                            if line[2][-1].lower() == 's':
+                                lat = -1.*lat
+                        elif len(line) == 4: #XX:XX:XXH format
+                            lat = float(line[1]) + float(line[2])/60 + float(line[3][:-1])/3600
+                            if line[3][-1].lower() == 's':
+                                lat = -1.*lat
+                    else:
+                        if len(line) == 2: #XX.XXX format
+                            lat = float(line[1])
+                        elif len(line) == 3: #XX:XX.XXX format
+                            lat = float(line[1]) + float(line[2])/60
+                        elif len(line) == 4: #XX:XX:XX format
+                            lat = float(line[1]) + float(line[2])/60 + float(line[3])/3600
                         
-                                
-                #space-delimited temperature-depth obs or comments- attempt to parse as profile data, error will raise/function will move to next line if not
-                else: 
-                    line = line.strip().split() 
-                    cdepth = float(line[depthcolumn])
-                    ctemp = float(line[tempcolumn])
-                    if cdepth >= 0 and ctemp >= -10 and ctemp <= 50:
-                        rawdepth.append(cdepth)
-                        rawtemperature.append(ctemp)
+                elif "longitude" in key:
+                    if 'e' in line[-1].lower() or 'w' in line[-1].lower():
+                        if len(line) == 2: #XX.XXXH format
+                            lon = float(line[1][:-1])
+                            if line[1][-1].lower() == 'w':
+                                lon = -1.*lon
+                        elif len(line) == 3: #XX:XX.XXXH format
+                            lon = float(line[1]) + float(line[2][:-1])/60
+                            if line[2][-1].lower() == 'w':
+                                lon = -1.*lon
+                        elif len(line) == 4: #XX:XX:XXH format
+                            lon = float(line[1]) + float(line[2])/60 + float(line[3][:-1])/3600
+                            if line[3][-1].lower() == 'w':
+                                lon = -1.*lon
+                    else:
+                        if len(line) == 2: #XX.XXX format
+                            lon = float(line[1])
+                        elif len(line) == 3: #XX:XX.XXX format
+                            lon = float(line[1]) + float(line[2])/60
+                        elif len(line) == 4: #XX:XX:XX format
+                            lon = float(line[1]) + float(line[2])/60 + float(line[3])/3600
+                            
+                            
+                elif "field" in key: #specifying which column contains temperature and depth
+                    if "temperature" in line[1].lower():
+                        tempcolumn = int(line[0].strip()[5]) - 1
+                    elif "depth" in line[1].lower():
+                        depthcolumn = int(line[0].strip()[5]) - 1
                     
-            except (ValueError, IndexError, AttributeError):
-                pass
+                            
+            #space-delimited temperature-depth obs or comments- attempt to parse as profile data, error will raise/function will move to next line if not
+            else: 
+                line = line.strip().split() 
+                cdepth = float(line[depthcolumn])
+                ctemp = float(line[tempcolumn])
+                if cdepth >= 0 and ctemp >= -10 and ctemp <= 50:
+                    rawdepth.append(cdepth)
+                    rawtemperature.append(ctemp)
+                
+        except (ValueError, IndexError, AttributeError):
+            pass
             
     #converting to numpy arrays
     rawtemperature = np.asarray(rawtemperature)
@@ -336,11 +371,6 @@ def readedffile(edffile):
 def writeedffile(edffile,temperature,depth,year,month,day,hour,minute,second,lat,lon,tcoeff,zcoeff,comments):
     with open(edffile,'w') as f_out:
     
-        #writing header, date and time, drop # (bad value)
-        f_out.write("// This is an AXBT EXPORT DATA FILE  (EDF)\n//\n")
-        f_out.write(f"Date of Launch:  {month:02d}/{day:02d}/{year-2000}\n")
-        f_out.write(f"Time of Launch:  {hour:02d}:{minute:02d}:{second:02d}\n")
-        
         #latitude and longitude
         if lat >= 0:
             nsh = 'N'
@@ -356,10 +386,15 @@ def writeedffile(edffile,temperature,depth,year,month,day,hour,minute,second,lat
         londeg = int(np.floor(lon))
         latmin = (lat - latdeg)*60
         lonmin = (lon - londeg)*60
-        f_out.write(f"Latitude      :  {latdeg:02d}:{latmin:06.3f}{nsh}\n")
-        f_out.write(f"Longitude     :  {londeg:03d}:{lonmin:06.3f}{ewh}\n")
 
-        f_out.write(f"""//
+        #writing full header in one call: date and time, drop # (bad value), position, drop settings and comments
+        f_out.write(f"""// This is an AXBT EXPORT DATA FILE  (EDF)
+//
+Date of Launch:  {month:02d}/{day:02d}/{year-2000}
+Time of Launch:  {hour:02d}:{minute:02d}:{second:02d}
+Latitude      :  {latdeg:02d}:{latmin:06.3f}{nsh}
+Longitude     :  {londeg:03d}:{lonmin:06.3f}{ewh}
+//
 // Drop Settings Information:
 Probe Type       :  AXBT
 Terminal Depth   :  800 m
@@ -382,15 +417,12 @@ Field1           :  Depth (m)
 Depth (m)  - Temperature (°C)\n""")
 
         #removing NaNs from T-D profile
-        ind = []
-        for t,d in zip(temperature,depth):
-            ind.append(not np.isnan(t) and not np.isnan(d))
+        ind = ~(np.isnan(temperature) | np.isnan(depth))
         depth = depth[ind]
         temperature = temperature[ind]
 
-        #adding temperature-depth data now
-        for d,t in zip(depth,temperature):
-            f_out.write(f"{round(d,1):05.1f}\t{round(t,2):05.2f}\n")
+        #adding temperature-depth data now (rounded before formatting, as with round() previously)
+        np.savetxt(f_out, np.column_stack((np.round(depth,1),np.round(temperature,2))), fmt='%05.1f\t%05.2f')
 
     
     
@@ -423,8 +455,8 @@ def readjjvvfile(jjvvfile):
         latstr = line[3]
         lonstr = line[4]
         quad = int(latstr[0])
-        lat = np.double(latstr[1:3]) + np.double(latstr[3:])/10**(len(latstr)-3)
-        lon = np.double(lonstr[:3]) + np.double(lonstr[3:])/10**(len(lonstr)-3)
+        lat = float(latstr[1:3]) + float(latstr[3:])/10**(len(latstr)-3)
+        lon = float(lonstr[:3]) + float(lonstr[3:])/10**(len(lonstr)-3)
         if quad == 3:#hemisphere (if quad == 1, no need to change anything)
             lat = -1*lat
         elif quad == 5:
@@ -435,32 +467,28 @@ def readjjvvfile(jjvvfile):
             
         lastdepth = -1
         hundreds = 0
-        l = 0
 
         identifier = 'UNKNOWN'
 
-        for line in f_in:
-            l = l + 1
-
-            #removing non-data entry from first column, 2nd line of JJVV
-            line = line.strip().split()
-            if l == 1: line = line[1:]
+        #all remaining entries as one list of tokens (removing non-data entry from first column, 2nd line of JJVV)
+        entries = f_in.readline().split()[1:] + f_in.read().split()
 
-            for curentry in line:
+        for curentry in entries:
 
-                try:
-                    int(curentry) #won't execute if curentry has non-numbers in it (e.g. the current entry is the identifier)
+            #data entries are five-digit groups, anything else (e.g. the identifier) is not parsed as data
+            if len(curentry) == 5 and curentry.isdecimal():
+                code = int(curentry) #converted once, depth/temperature codes are split arithmetically
 
-                    if int(curentry[:3]) == 999 and int(curentry[3:])*100 == hundreds + 100:
-                        hundreds = hundreds + 100
-                    else:
-                        if int(curentry[:2]) + hundreds != lastdepth:
-                            cdepth = int(curentry[:2]) + hundreds
-                            lastdepth = cdepth
-                            depth.append(cdepth)
-                            temperature.append(np.double(curentry[2:])/10)
+                if code//100 == 999 and (code%100)*100 == hundreds + 100:
+                    hundreds = hundreds + 100
+                else:
+                    cdepth = code//1000 + hundreds
+                    if cdepth != lastdepth:
+                        lastdepth = cdepth
+                        depth.append(cdepth)
+                        temperature.append((code%1000)/10)
 
-                except: identifier = curentry
+            else: identifier = curentry
     
     #converting to numpy arrays
     depth = np.asarray(depth)
@@ -493,23 +521,27 @@ def writejjvvfile(jjvvfile,temperature,depth,day,month,year,time,lat,lon,identif
         filestrings = []
         filestrings.append('51099')
         hundreds = 0
-        i = 0
-        lastdepth = -1
+
+        #rounded depths: only points deeper than all previous points are written (NaN depths are skipped)
+        depthround = np.round(depth)
+        prevmax = np.fmax.accumulate(np.append(-1, depthround)[:-1])
+        iswritten = depthround > prevmax
+
+        #depths, hundreds counters, and temperature codes (tenths of a degree) for all written points at once
+        depthround = depthround[iswritten]
+        depthhundreds = np.maximum(depthround//100, 0).astype(int).tolist()
+        writtentemps = np.round(temperature[iswritten],1)
+        if not np.isfinite(writtentemps).all(): #astype(int) would silently turn NaN/inf into a bogus temperature code
+            raise ValueError("cannot write a non-finite temperature to a JJVV file")
+        tempcodes = (writtentemps*10).astype(int).tolist()
+        depthround = depthround.tolist()
 
         # appending data to list, adding hundreds increment counters where necessary (while loop necessary in case a gap > 100m exists)
-        while i < len(depth):
-            cdepth = round(depth[i])
-            ctemp = temperature[i]
-            
-            if cdepth - hundreds > 99:  # need to increment hundreds counter in file
+        for cdepth,chundreds,ctempcode in zip(depthround,depthhundreds,tempcodes):
+            while hundreds < chundreds*100:  # need to increment hundreds counter in file
                 hundreds = hundreds + 100
                 filestrings.append(f'999{int(hundreds/100):02d}')
-            else:
-                if cdepth - lastdepth >= 1 and cdepth - hundreds <= 99:  # depth must be increasing, not outside of current hundreds range
-                    lastdepth = cdepth
-                    filestrings.append(f"{int(round(cdepth-hundreds)):02d}{int(round(ctemp,1)*10):03d}")
-                    
-                i += 1
+            filestrings.append(f"{int(round(cdepth-hundreds)):02d}{ctempcode:03d}")
 
         if isbtmstrike: #note if the profile struck the bottom
             filestrings.append('00000')
@@ -517,25 +549,12 @@ def writejjvvfile(jjvvfile,temperature,depth,day,month,year,time,lat,lon,identif
         identifier = identifier[:5] #concatenates if larger than 5 digits
         filestrings.append(identifier) #tack identifier onto end of file entries
 
-        #writing all data to file
-        i = 0
-        while i < len(filestrings):
-            if i == 0 and len(filestrings) >= 6: #first line has six columns (only if there is enough data)
-                line = f"{filestrings[i]} {filestrings[i+1]} {filestrings[i+2]} {filestrings[i+3]} {filestrings[i+4]} {filestrings[i+5]}\n"
-                i += 6
-            elif i+5 < len(filestrings): #remaining full lines have five columns
-                line = f"{filestrings[i]} {filestrings[i+1]} {filestrings[i+2]} {filestrings[i+3]} {filestrings[i+4]}\n"
-                i += 5
-            else: #remaining data on last line
-                line = ''
-                while i < len(filestrings):
-                    line += filestrings[i]
-                    if i == len(filestrings) - 1:
-                        line += '\n'
-                    else:
-                        line += ' '
-                    i += 1
-            f_out.write(line)
+        #writing all data to file: first line has six columns (only if there is enough data), remaining lines have five
+        if len(filestrings) >= 6:
+            lines = [filestrings[:6]] + [filestrings[i:i+5] for i in range(6,len(filestrings),5)]
+        else:
+            lines = [filestrings]
+        f_out.write(''.join(' '.join(cline) + '\n' for cline in lines))
             
 
 
@@ -555,28 +574,15 @@ def readfinfile(finfile):
         day = curdate.day
         month = curdate.month
         time = int(line[2])
-        lat = np.double(line[3])
-        lon = np.double(line[4])
+        lat = float(line[3])
+        lon = float(line[4])
         num = int(line[5])
 
-        #setting up lists
-        temperature = []
-        depth = []
-
-        #reading temperature depth profiles
-        for line in f_in:
-
-            line = line.strip().split()
-
-            i = 0
-            while i < len(line)/2:
-                depth.append(np.double(line[2*i+1]))
-                temperature.append(np.double(line[2*i]))
-                i = i + 1
-
-    #converting data to arrays
-    depth = np.asarray(depth)
-    temperature = np.asarray(temperature)
+        #reading temperature depth profiles (alternating temperature/depth entries) in one pass
+        profdata = np.array(f_in.read().split(), dtype=np.float64)
+        
+    temperature = profdata[0::2]
+    depth = profdata[1::2]
     
     return [temperature,depth,day,month,year,time,lat,lon,num]
 
@@ -607,22 +613,13 @@ def writefinfile(finfile,temperature,depth,day,month,year,time,lat,lon,num):
         #writing header data
         f_out.write(f"{year}   {dayofyear:03d}   {time:04d}   {latsign}{lat:06.3f}   {lonsign}{lon:07.3f}   {num:02d}   6   {len(depth)}   0   0   \n")
 
-        #writing profile data
-        i = 0
-        while i < len(depth):
-
-            if i+5 < len(depth):
-                line = f"{temperature[i]: 8.3f}{depth[i]: 8.1f}{temperature[i+1]: 8.3f}{depth[i+1]: 8.1f}{temperature[i+2]: 8.3f}{depth[i+2]: 8.1f}{temperature[i+3]: 8.3f}{depth[i+3]: 8.1f}{temperature[i+4]: 8.3f}{depth[i+4]: 8.1f}\n"
-
-            else:
-                line = ''
-                while i < len(depth):
-                    line += f"{temperature[i]: 8.3f}{depth[i]: 8.1f}"
-                    i += 1
-                line = line + '\n'
-
-            f_out.write(line)
-            i = i + 5
+        #writing profile data (five temperature/depth pairs per line): all full lines are formatted in one call, followed
+        #by any remaining pairs on the last line
+        profdata = np.column_stack((temperature,depth))
+        numfull = len(depth)//5
+        np.savetxt(f_out, profdata[:numfull*5].reshape(-1,10), fmt='% 8.3f% 8.1f'*5)
+        if len(depth) > numfull*5:
+            np.savetxt(f_out, profdata[numfull*5:].reshape(1,-1), fmt='% 8.3f% 8.1f'*(len(depth)-numfull*5))
 
 
 
@@ -669,112 +666,95 @@ def writebufrfile(bufrfile, temperature, depth, year, month, day, time, lon, lat
     # whether data is observed, compressed (bits 1/2), bits 3-8 reserved (=0)
     s3oct7 = int('10000000', 2)
     
-    fxy_all = [int('0000000100001011', 2),int('1100000100001011', 2),int('1100000100001100', 2),int('1100000100010111', 2),int('0000001000100000', 2),int('0100001000000000', 2),int('0001111100000010', 2),int('0000011100111110', 2),int('0001011000101010', 2),] #WITH DELAYED (8-bit) REPLICATION
 
     # Section 4 info (data)
     identifier = identifier[:9] #concatenates identifier if necessary
-    idtobuffer = 9 - len(identifier) # padding and encoding station identifier
-    id_utf = identifier.encode('utf-8')
-    for i in range(0, idtobuffer):
-        id_utf = id_utf + b'\0' #pads with null character (\0 in python)
-
-    # setting up data array
-    bufrarray = ''
-
-    # year/month/day (3,01,011)
-    bufrarray = bufrarray + format(year, '012b')  # year (0,04,001)
-    bufrarray = bufrarray + format(month, '04b')  # month (0,04,002)
-    bufrarray = bufrarray + format(day, '06b')  # day (0,04,003)
-
-    # hour/minute (3,01,012)
-    bufrarray = bufrarray + format(hour, '05b')  # hour (0,04,004)
-    bufrarray = bufrarray + format(minute, '06b')  # min (0,04,005)
-
-    # lat/lon (3,01,023)
-    bufrarray = bufrarray + format(int(np.round((lat * 100)) + 9000), '015b')  # lat (0,05,002)
-    bufrarray = bufrarray + format(int(np.round((lon * 100)) + 18000), '016b')  # lon (0,06,002)
-
-    # temperature-depth profile (3,06,001)
-    bufrarray = bufrarray + '00'  # indicator for digitization (0,02,032): 'values at selected depths' = 0
-    bufrarray = bufrarray + format(len(temperature),'16b')  # delayed descripter replication factor(0,31,001) = length
-    
-    #converting temperature and depth and writing
-    for t,d in zip(temperature,depth):
-        d_in = int(np.round(d*10)) # depth (0,07,062)
-        bufrarray = bufrarray + format(d_in,'017b')
-        t_in = int(np.round(10 * (t + 273.15)))  # temperature (0,22,042)
-        bufrarray = bufrarray + format(t_in,'012b')
-
-    #padding zeroes to get even octet number, determining total length
-    bufrrem = len(bufrarray)%8
-    for i in range(8-bufrrem):
-        bufrarray = bufrarray + '0'
-    bufrarraylen = int(len(bufrarray)/8)
+    id_utf = identifier.encode('utf-8').ljust(9, b'\0') # encoding station identifier, padded with null characters (\0 in python)
+
+    # data values and their bit widths, in order: year/month/day (3,01,011), hour/minute (3,01,012), lat/lon (3,01,023),
+    # indicator for digitization (0,02,032): 'values at selected depths' = 0, delayed descriptor replication factor (0,31,002) = length
+    headervals = [year, month, day, hour, minute, int(np.round((lat * 100)) + 9000), int(np.round((lon * 100)) + 18000), 0, len(temperature)]
+    headerwidths = [12, 4, 6, 5, 6, 15, 16, 2, 16]
+
+    # temperature-depth profile (3,06,001): alternating depth (0,07,062) and temperature (0,22,042) for each point
+    if not (np.isfinite(depth).all() and np.isfinite(temperature).all()): #NaN/inf can't be cast to the integer fields below
+        raise ValueError("cannot write a non-finite temperature or depth to a BUFR file")
+    profvals = np.empty(2*len(temperature), dtype=np.int64)
+    profvals[0::2] = np.round(np.asarray(depth)*10)
+    profvals[1::2] = np.round(10 * (np.asarray(temperature) + 273.15))
+    profwidths = np.tile([17, 12], len(temperature))
+
+    bufrdata = packbufrbits(np.append(headervals, profvals), np.append(headerwidths, profwidths))
+    bufrarraylen = len(bufrdata)
     sxn4len = 4 + 9 + bufrarraylen  # length/reserved + identifier + bufrarraylen (lat/lon, dtg, t/d profile)
     
     # total length of file in octets
     num_octets = 8 + sxn1len + sxn2len + sxn3len + sxn4len + 4  # sxn's 0 and 5 always have 8 and 4 octets, respectively
 
+    # assembling the full message in memory so the file is written with a single call- fixed-width fields in each
+    # section are packed together with struct (big-endian, B = 1 octet, H = 2 octets), 3-octet lengths with to_bytes
+    bufrmsg = bytearray()
+
+    # Section 0 (indicator)
+    bufrmsg.extend(b'BUFR')  # BUFR
+    bufrmsg.extend(num_octets.to_bytes(3, byteorder=binarytype, signed=False))  # length (in octets)
+    bufrmsg.extend(struct.pack('>B', version))
+
+    # Section 1 (identifier) ***BUFR version 3 or 4 ****
+    bufrmsg.extend(sxn1len.to_bytes(3, byteorder=binarytype, signed=False))
+    if version == 3:
+        bufrmsg.extend(struct.pack('>15B', mastertable, originatingsubcenter, originatingcenter, updatesequencenum, hasoptionalsectionnum,
+            datacategory, datasubcategory, versionofmaster, versionoflocal, yearofcentury, month, day, hour, minute, 0)) #oct18 = 0 (reserved)
+    elif version == 4:
+        bufrmsg.extend(struct.pack('>BHHBBBBBBBHBBBBB', mastertable, originatingcenter, originatingsubcenter, updatesequencenum, hasoptionalsectionnum,
+            datacategory, datasubcategory, datasubcategory, versionofmaster, versionoflocal, year, month, day, hour, minute, 0)) #datasubcategory written again for local data subcategory, seconds = 0
+
+    # Section 2 (optional)
+    if hasoptionalsection:
+        bufrmsg.extend(sxn2len.to_bytes(3, byteorder=binarytype, signed=False))
+        bufrmsg.extend(struct.pack('>B', reserved))
+        bufrmsg.extend(optionalinfo)
+
+    # Section 3 (Data description)
+    bufrmsg.extend(sxn3len.to_bytes(3, byteorder=binarytype, signed=False))
+    bufrmsg.extend(struct.pack('>BHB', reserved, numdatasubsets, s3oct7))
+    bufrmsg.extend(BUFRFXYBYTES)
+
+    # Section 4
+    bufrmsg.extend(sxn4len.to_bytes(3, byteorder=binarytype, signed=False))
+    bufrmsg.extend(struct.pack('>B', reserved))
+    bufrmsg.extend(id_utf)
+    bufrmsg.extend(bufrdata) #profile data
+
+    # Section 5 (End)
+    bufrmsg.extend(b'7777')
+
     # writing the file
     with open(bufrfile, 'wb') as bufr:
+        bufr.write(bufrmsg)
 
-        # Section 0 (indicator)
-        bufr.write(b'BUFR')  # BUFR
-        bufr.write(num_octets.to_bytes(3, byteorder=binarytype, signed=False))  # length (in octets)
-        bufr.write(version.to_bytes(1, byteorder=binarytype, signed=False))
-
-        # Section 1 (identifier) ***BUFR version 3 or 4 ****
-        bufr.write(sxn1len.to_bytes(3, byteorder=binarytype, signed=False))
-        bufr.write(mastertable.to_bytes(1, byteorder=binarytype, signed=False))
-        if version == 3:
-            bufr.write(originatingsubcenter.to_bytes(1, byteorder=binarytype, signed=False))
-            bufr.write(originatingcenter.to_bytes(1, byteorder=binarytype, signed=False))
-        elif version == 4:
-            bufr.write(originatingcenter.to_bytes(2, byteorder=binarytype, signed=False))
-            bufr.write(originatingsubcenter.to_bytes(2, byteorder=binarytype, signed=False))
-        bufr.write(updatesequencenum.to_bytes(1, byteorder=binarytype, signed=False))
-        bufr.write(hasoptionalsectionnum.to_bytes(1, byteorder=binarytype, signed=False))
-        bufr.write(datacategory.to_bytes(1, byteorder=binarytype, signed=False))
-        bufr.write(datasubcategory.to_bytes(1, byteorder=binarytype, signed=False))
-        if version == 4:
-            bufr.write(datasubcategory.to_bytes(1, byteorder=binarytype, signed=False)) #write again for local data subcategory in version 4
-        bufr.write(versionofmaster.to_bytes(1, byteorder=binarytype, signed=False))
-        bufr.write(versionoflocal.to_bytes(1, byteorder=binarytype, signed=False))
-        if version == 3:
-            bufr.write(yearofcentury.to_bytes(1, byteorder=binarytype, signed=False))
-        elif version == 4:
-            bufr.write(year.to_bytes(2, byteorder=binarytype, signed=False))
-        bufr.write(month.to_bytes(1, byteorder=binarytype, signed=False))
-        bufr.write(day.to_bytes(1, byteorder=binarytype, signed=False))
-        bufr.write(hour.to_bytes(1, byteorder=binarytype, signed=False))
-        bufr.write(minute.to_bytes(1, byteorder=binarytype, signed=False))
-        bufr.write(int(0).to_bytes(1, byteorder=binarytype, signed=False)) #seconds for v4, oct18 = 0 (reserved) for v3
-
-        # Section 2 (optional)
-        if hasoptionalsection:
-            bufr.write(sxn2len.to_bytes(3, byteorder=binarytype, signed=False))
-            bufr.write(reserved.to_bytes(1, byteorder=binarytype, signed=False))
-            bufr.write(optionalinfo)
-
-        # Section 3 (Data description)
-        bufr.write(sxn3len.to_bytes(3, byteorder=binarytype, signed=False))
-        bufr.write(reserved.to_bytes(1, byteorder=binarytype, signed=False))
-        bufr.write(numdatasubsets.to_bytes(2, byteorder=binarytype, signed=False))
-        bufr.write(s3oct7.to_bytes(1, byteorder=binarytype, signed=False))
-        for fxy in fxy_all:
-            bufr.write(fxy.to_bytes(2, byteorder=binarytype, signed=False))
-
-        # Section 4
-        bufr.write(sxn4len.to_bytes(3, byteorder=binarytype, signed=False))
-        bufr.write(reserved.to_bytes(1, byteorder=binarytype, signed=False))
-        bufr.write(id_utf)
-
-        #writing profile data- better option- converts and writes 1 byte at a time
-        for cbit in np.arange(0,len(bufrarray),8):
-            bufr.write(int(bufrarray[cbit:cbit+8],2).to_bytes(1,byteorder=binarytype,signed=False)) #writing profile data
-
-        # Section 5 (End)
-        bufr.write(b'7777')
+        
+        
+#packs each value in values into the corresponding number of bits in widths (big-endian, concatenated in order) and
+#returns the result as bytes, padded with 1-8 zero bits to end on a full octet
+def packbufrbits(values,widths):
+    
+    values = np.asarray(values, dtype=np.int64)
+    widths = np.asarray(widths, dtype=np.int64)
+    numbits = np.sum(widths)
+    
+    #values outside of their field would otherwise be silently truncated to their lowest bits
+    if np.any(values < 0) or np.any(values >= np.left_shift(1, widths)):
+        raise ValueError("value does not fit in its BUFR field width")
+    
+    #shift needed to move each output bit of its value to the ones place
+    fieldstarts = np.cumsum(widths) - widths
+    shifts = np.repeat(fieldstarts + widths - 1, widths) - np.arange(numbits)
+    
+    bits = np.zeros(numbits + 8 - numbits%8, dtype=np.uint8)
+    bits[:numbits] = (np.repeat(values, widths) >> shifts) & 1
+    
+    return np.packbits(bits).tobytes()
 
         
         
@@ -801,3 +781,20 @@ def readkmlfile(kmlfile):
 
     #return the kml file object
     return data
+
+
+
+#read functions for each file type, so readfiles() can be told which type of file to read by name
+READERS = {'log':readlogfile, 'edf':readedffile, 'fin':readfinfile, 'jjvv':readjjvvfile}
+
+
+
+#reads multiple files in parallel with the specified read function (threads overlap file I/O, which releases the GIL)
+#reader may be a read function or one of the file types in READERS (e.g. 'edf')
+#the read functions only use local state (none of them change global settings such as the warning filters), so they
+#are safe to run in separate threads
+def readfiles(files, reader=readlogfile, maxworkers=None):
+    if isinstance(reader, str):
+        reader = READERS[reader.lower()]
+    with ThreadPoolExecutor(max_workers=maxworkers) as executor:
+        return list(executor.map(reader, files))